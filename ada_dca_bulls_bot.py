@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 # (short header omitted for brevity — identical to prior message)
-import os, time, math, uuid, logging
-from typing import Optional, Tuple, List
-from pybit.unified_trading import HTTP
+import os, time, math, random, logging, asyncio, atexit, queue, threading
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fractions import Fraction
+import numpy as np
+import orjson
+from requests.adapters import HTTPAdapter
+from pybit.unified_trading import HTTP, WebSocket
+from pybit.exceptions import InvalidRequestError
 
 _level = os.environ.get("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=getattr(logging, _level, logging.INFO),
-                    format="%(asctime)s %(levelname)s: %(message)s")
+# log records are written by a background listener thread
+_log_handler = logging.StreamHandler(); _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))
+_log_queue = queue.SimpleQueue(); _log_listener = QueueListener(_log_queue, _log_handler)
+logging.basicConfig(level=getattr(logging, _level, logging.INFO), format="%(message)s", handlers=[QueueHandler(_log_queue)])
+_log_listener.start(); atexit.register(_log_listener.stop)
+log = logging.getLogger(__name__)
 
 def env_float(name, default): 
     try: return float(os.environ.get(name, default))
@@ -21,6 +32,7 @@ def env_bool(name, default):
 SYMBOL   = os.environ.get("SYMBOL", "ADAUSDT")
 CATEGORY = os.environ.get("CATEGORY", "linear")
 POLL_SEC = env_float("POLL_SEC", 3.0)
+ADAPTIVE_POLL = env_bool("ADAPTIVE_POLL", False)   # poll faster as price nears the DCA/TP trigger
 
 EQUITY_USDT = env_float("EQUITY_USDT", 150.0)
 USE_CROSS   = env_bool("USE_CROSS", False)
@@ -48,41 +60,90 @@ SEED_ON_LAST_DIR_AT_START = env_bool("SEED_ON_LAST_DIR_AT_START", True)
 TAKER_FEE = env_float("TAKER_FEE", 0.0006)
 MAKER_FEE = env_float("MAKER_FEE", 0.0002)
 
+USE_WS = env_bool("USE_WS", True)
+REST_WORKERS = 4
+
+_floor = math.floor; _sleep = time.sleep
+
+# Bybit retCodes that won't pass on a retry
+_FATAL_RETCODES = frozenset((10001, 10003, 10004, 10005, 110001, 110003, 110004, 110007, 110012, 110017, 110025, 110043))
+
+def _retryable(e):
+    return not (isinstance(e, InvalidRequestError) and e.status_code in _FATAL_RETCODES)
+
 def with_retry(fn, *args, **kwargs):
     tries = kwargs.pop("_tries", 5)
     for i in range(tries):
         try: return fn(*args, **kwargs)
         except Exception as e:
-            import time
-            wait = 1.2 * (2 ** i)
-            logging.warning("API call failed (%d/%d): %s; retrying in %.1fs", i+1, tries, e, wait)
-            time.sleep(wait)
+            if not _retryable(e): raise
+            wait = 0.2 * (2 ** i) + random.uniform(0, 0.1 * i)   # 6.2s (+<=1s jitter) over 5 tries
+            log.warning("API call failed (%d/%d, code=%s): %s; retrying in %.1fs",
+                        i+1, tries, getattr(e, "status_code", "-"), e, wait)
+            _sleep(wait)
     return fn(*args, **kwargs)
 
-def bulls_signal_from_klines(klines: List[List[str]]):
+class CoolDown(Exception):
+    """Raised instead of calling an endpoint that is still backing off."""
+
+class RetryBudget:
+    """Non-blocking retry for hot-path reads: a failing endpoint cools down and raises CoolDown meanwhile."""
+    def __init__(self): self.state = {}   # fn.__qualname__ -> (next_try_ts, fail_count)
+    def call(self, fn, *args, **kwargs):
+        key = getattr(fn, "__qualname__", repr(fn)); next_try, fails = self.state.get(key, (0.0, 0))
+        now = time.monotonic()
+        if now < next_try: raise CoolDown(key)
+        try: r = fn(*args, **kwargs)
+        except Exception as e:
+            wait = 1.2 * (2 ** min(fails, 4)); self.state[key] = (now + wait, fails + 1)
+            log.warning("API call %s failed (%d): %s; cooling down %.1fs", key, fails + 1, e, wait)
+            raise
+        if fails: self.state.pop(key, None)
+        return r
+
+async def _ready(v): return v
+
+def _orjson_response(r, *args, **kwargs):
+    r.json = lambda **_: orjson.loads(r.content); return r
+
+def _keep_warm(http, every=30.0):
+    def run():
+        while True:
+            time.sleep(every)
+            try: http.get_server_time()
+            except Exception as e: log.debug("keep-warm ping failed: %s", e)
+    threading.Thread(target=run, name="keep-warm", daemon=True).start()
+
+try:
+    from bulls_aot import bulls_kernel as _bulls_kernel   # native build from build_aot.py
+    _bulls_kernel(*np.zeros((4, 60)), 50, 30)   # stale build raises here
+except (ImportError, TypeError):
+    from numba import njit
+    from bulls_kernel import bulls_kernel
+    _bulls_kernel = njit(cache=True, fastmath=True)(bulls_kernel)
+
+def bulls_signal_from_klines(klines: np.ndarray):
     length = 50; bars = 30
-    o = [float(x[1]) for x in klines]
-    h = [float(x[2]) for x in klines]
-    l = [float(x[3]) for x in klines]
-    c = [float(x[4]) for x in klines]
-    n = len(c)
-    if n < max(length, 35): return (False, False, False, False, [0]*n)
-    highest = [max(h[max(0, i-length+1):i+1]) for i in range(n)]
-    lowest  = [min(l[max(0, i-length+1):i+1]) for i in range(n)]
-    bindex = [0]*n; sindex = [0]*n; lelex = [0]*n
-    for i in range(n):
-        if i>=1: bindex[i], sindex[i] = bindex[i-1], sindex[i-1]
-        if i>=4 and c[i] > c[i-4]: bindex[i]+=1
-        if i>=4 and c[i] < c[i-4]: sindex[i]+=1
-        condShort = bindex[i] > bars and c[i] < o[i] and h[i] >= highest[i]
-        condLong  = sindex[i] > bars and c[i] > o[i] and l[i] <= lowest[i]
-        if condShort: bindex[i] = 0; lelex[i] = -1
-        elif condLong: sindex[i] = 0; lelex[i] = 1
-    sigL = (lelex[-1] == 1); sigS = (lelex[-1] == -1)
-    freshL = sigL and (lelex[-2] != 1); freshS = sigS and (lelex[-2] != -1)
-    return sigL, sigS, freshL, freshS, lelex
+    n = len(klines)
+    if n < max(length, 35): return (False, False, False, False, 0)
+    o, h, l, c = np.ascontiguousarray(klines[:, 1:5].T)
+    last, prev, recent_dir = _bulls_kernel(o, h, l, c, length, bars)
+    sigL = (last == 1); sigS = (last == -1)
+    freshL = sigL and (prev != 1); freshS = sigS and (prev != -1)
+    return sigL, sigS, freshL, freshS, recent_dir
 
 class ADADcaBullsBot:
+    __slots__ = ("http", "symbol", "category", "poll_sec", "qty_step", "min_qty", "tick_size",
+                 "_qty_step_inv", "_px_step_inv", "_qty_num", "_qty_den", "_px_num", "_px_den",
+                 "pos_qty", "avg_entry", "used_usdt", "leg_usdt", "level", "last_fill_px",
+                 "entry_fees_paid", "tp_order_id", "tp_link_id", "last_dir", "did_start_seed",
+                 "budget", "long_base", "short_base",
+                 "_cached_tp_price", "_tp_long_mult", "_tp_short_mult", "_next_adverse_px", "_dca_ladder",
+                 "_ladder_long", "_ladder_short", "_last_tp",
+                 "_link_seq", "_reads",
+                 "ws", "_ws_px", "_ws_px_ts", "pws", "_tp_filled_link",
+                 "_aloop", "_wake", "_next_sync", "_pool",
+                 "_klines_np", "_last_bulls", "_next_hour_ts", "_kl_lock")
     def __init__(self, http: HTTP):
         self.http = http; self.symbol = SYMBOL; self.category = CATEGORY; self.poll_sec = POLL_SEC
         info = with_retry(self.http.get_instruments_info, category=self.category, symbol=self.symbol)
@@ -90,165 +151,277 @@ class ADADcaBullsBot:
         lot = inst["lotSizeFilter"]; pricef = inst["priceFilter"]
         self.qty_step = float(lot["qtyStep"]); self.min_qty = float(lot["minOrderQty"])
         self.tick_size = float(pricef["tickSize"])
+        # exact step fractions, so 0.3 with a 0.1 step rounds to 0.3
+        qf = Fraction(lot["qtyStep"]); pf = Fraction(pricef["tickSize"])
+        self._qty_num, self._qty_den = qf.numerator, qf.denominator; self._px_num, self._px_den = pf.numerator, pf.denominator
+        self._qty_step_inv = self._qty_den / self._qty_num; self._px_step_inv = self._px_den / self._px_num
         try:
             self.http.switch_position_mode(category=self.category, symbol=self.symbol, mode=0)
-            logging.info("Position mode One-Way")
+            log.info("Position mode One-Way")
         except Exception as e:
-            if "not modified" in str(e): logging.info("Position mode unchanged (One-Way).")
-            else: logging.warning("Cannot switch One-Way: %s", e)
+            if "not modified" in str(e): log.info("Position mode unchanged (One-Way).")
+            else: log.warning("Cannot switch One-Way: %s", e)
         try:
             self.http.set_leverage(category=self.category, symbol=self.symbol,
                                    buyLeverage=str(LEVERAGE_X), sellLeverage=str(LEVERAGE_X))
-            logging.info("Leverage set to %sx", LEVERAGE_X)
+            log.info("Leverage set to %sx", LEVERAGE_X)
         except Exception as e:
-            if "not modified" in str(e): logging.info("Leverage unchanged.")
-            else: logging.warning("Cannot set leverage: %s", e)
+            if "not modified" in str(e): log.info("Leverage unchanged.")
+            else: log.warning("Cannot set leverage: %s", e)
         self.pos_qty = 0.0; self.avg_entry = None; self.used_usdt = 0.0
         self.leg_usdt = 0.0; self.level = -1; self.last_fill_px = None
         self.entry_fees_paid = 0.0; self.tp_order_id = None; self.last_dir = 0
+        self._cached_tp_price: Optional[float] = None   # valid until avg_entry next changes
+        self._next_adverse_px: Optional[float] = None   # next DCA trigger, set on each fill
+        self._dca_ladder: Tuple[float, ...] = ()          # leg USDT per DCA level, picked at seed
+        self._tp_long_mult = 1.0 + TP_PCT/100.0; self._tp_short_mult = 1.0 - TP_PCT/100.0
         self.did_start_seed = False
+        self._link_seq = int(time.time()*1000) << 20
+        self.ws = None; self._ws_px = None; self._ws_px_ts = 0.0
+        self.pws = None
+        self.tp_link_id = None; self._tp_filled_link = None; self._last_tp = (None, None)
+        self._aloop = None; self._wake = None; self._next_sync = 0.0
+        self._reads = RetryBudget()
+        self._pool = ThreadPoolExecutor(max_workers=REST_WORKERS, thread_name_prefix="rest")
+        _bulls_kernel(*np.zeros((4, 200)), 50, 30)   # warm-up
+        self._kl_lock = threading.Lock()
+        self._load_klines(with_retry)
         self.budget = EQUITY_USDT * (LEVERAGE_X if USE_CROSS else 1.0)
         self.long_base, self.short_base = self._calc_bases()
+        self._ladder_long = self._build_ladder(self.long_base, VOL_SCALE_LONG)
+        self._ladder_short = self._build_ladder(self.short_base, VOL_SCALE_SHORT)
 
+    def _new_link(self):
+        self._link_seq += 1; return f"b{self._link_seq:016x}"
     def _sum_geo(self, s, k): return (1.0 - (s**k)) / (1.0 - s) if k>0 else 0.0
     def _calc_bases(self):
         return (self.budget/self._sum_geo(VOL_SCALE_LONG, 1+MAX_DCA),
                 self.budget/self._sum_geo(VOL_SCALE_SHORT,1+MAX_DCA))
     def _round_qty(self, q):
-        import math
-        q = math.floor(q / self.qty_step) * self.qty_step
+        q = _floor(q * self._qty_step_inv + 1e-9) * self._qty_num / self._qty_den
         return self.min_qty if (0 < q < self.min_qty) else q
     def _round_px(self, px):
-        import math
-        return math.floor(px / self.tick_size) * self.tick_size
+        return _floor(px * self._px_step_inv + 1e-9) * self._px_num / self._px_den
     def _last_and_mark(self):
-        r = with_retry(self.http.get_tickers, category=self.category, symbol=self.symbol)
+        r = self._reads.call(self.http.get_tickers, category=self.category, symbol=self.symbol)
         item = r["result"]["list"][0]
         last = float(item["lastPrice"]); mark = float(item.get("markPrice", last))
         return last, mark
     def _mkt(self, side, qty, price, reduce=False):
-        import uuid
         qty = self._round_qty(qty)
         if qty <= 0: return
         notional = qty * price
-        link = str(uuid.uuid4())
+        link = self._new_link()
         with_retry(self.http.place_order, category=self.category, symbol=self.symbol,
                    side="Buy" if side=="long" else "Sell",
                    orderType="Market", qty=str(qty), reduceOnly=reduce, orderLinkId=link)
         if not reduce: self.entry_fees_paid += notional * TAKER_FEE
-        logging.info("%s %s qty=%s", "OPEN" if not reduce else "CLOSE", side.upper(), qty)
+        if log.isEnabledFor(logging.INFO): log.info("%s %s qty=%s", "OPEN" if not reduce else "CLOSE", side.upper(), qty)
     def _place_tp_limit(self):
         if self.pos_qty == 0 or self.avg_entry is None: return
         trg = self._tp_target(); 
         if trg is None: return
-        qty = self._round_qty(abs(self.pos_qty)); self._cancel_tp()
-        import uuid
-        side = "Sell" if self.pos_qty > 0 else "Buy"
+        qty = self._round_qty(abs(self.pos_qty)); side = "Sell" if self.pos_qty > 0 else "Buy"
+        if self.tp_order_id and (trg, qty) == self._last_tp: return
+        if self.tp_order_id:
+            try:
+                self.http.amend_order(category=self.category, symbol=self.symbol, orderId=self.tp_order_id,
+                                      qty=str(qty), price=str(trg))
+                self._last_tp = (trg, qty)
+                if log.isEnabledFor(logging.INFO): log.info("Amend TP %s at %.6f qty=%s id=%s", side, trg, qty, self.tp_order_id)
+                return
+            except Exception as e: log.info("Amend TP failed (%s), re-placing", e)
+            self._cancel_tp()
+        self.tp_link_id = self._new_link()
         order = with_retry(self.http.place_order, category=self.category, symbol=self.symbol,
                            side=side, orderType="Limit", qty=str(qty),
                            price=str(trg), reduceOnly=True, timeInForce="PostOnly",
-                           closeOnTrigger=False, orderLinkId=str(uuid.uuid4()))
-        self.tp_order_id = order.get("result", {}).get("orderId")
-        logging.info("Place TP %s at %.6f qty=%s id=%s", side, trg, qty, self.tp_order_id)
+                           closeOnTrigger=False, orderLinkId=self.tp_link_id)
+        self.tp_order_id = order.get("result", {}).get("orderId"); self._last_tp = (trg, qty)
+        if log.isEnabledFor(logging.INFO): log.info("Place TP %s at %.6f qty=%s id=%s", side, trg, qty, self.tp_order_id)
     def _cancel_tp(self):
         if not self.tp_order_id: return
         try: with_retry(self.http.cancel_order, category=self.category, symbol=self.symbol, orderId=self.tp_order_id)
-        except Exception as e: logging.warning("Cancel TP failed: %s", e)
-        self.tp_order_id = None
+        except Exception as e: log.warning("Cancel TP failed: %s", e)
+        self.tp_order_id = None; self.tp_link_id = None; self._last_tp = (None, None)
     def _tp_target(self):
+        if self._cached_tp_price is not None: return self._cached_tp_price
         if self.pos_qty == 0 or self.avg_entry is None: return None
+        self._cached_tp_price = self._calc_tp_target(); return self._cached_tp_price
+    def _calc_tp_target_simple(self):
+        if self.pos_qty > 0: return self._round_px(self.avg_entry * self._tp_long_mult)
+        return self._round_px(self.avg_entry * self._tp_short_mult)
+    def _calc_tp_target_with_minprofit(self):
+        qty = abs(self.pos_qty); rhs = (self.entry_fees_paid + MIN_PROFIT_USD) / max(qty,1e-9)
         if self.pos_qty > 0:
-            raw = self.avg_entry * (1.0 + TP_PCT/100.0)
-            if MIN_PROFIT_USD > 0:
-                qty = abs(self.pos_qty); rhs = (self.entry_fees_paid + MIN_PROFIT_USD) / max(qty,1e-9)
-                raw = max(raw, (self.avg_entry + rhs)/(1.0 - TAKER_FEE))
+            raw = max(self.avg_entry * self._tp_long_mult, (self.avg_entry + rhs)/(1.0 - TAKER_FEE))
             return self._round_px(raw)
-        raw = self.avg_entry * (1.0 - TP_PCT/100.0)
-        if MIN_PROFIT_USD > 0:
-            qty = abs(self.pos_qty); rhs = (self.entry_fees_paid + MIN_PROFIT_USD) / max(qty,1e-9)
-            raw = min(raw, (self.avg_entry - rhs)/(1.0 + TAKER_FEE))
+        raw = min(self.avg_entry * self._tp_short_mult, (self.avg_entry - rhs)/(1.0 + TAKER_FEE))
         return self._round_px(raw)
+    _calc_tp_target = _calc_tp_target_with_minprofit if MIN_PROFIT_USD > 0 else _calc_tp_target_simple
     def _expected_pnl_pct(self, price):
         if self.pos_qty == 0 or self.avg_entry is None: return 0.0
         return 100.0 * (price/self.avg_entry - 1.0) if self.pos_qty>0 else 100.0 * (1.0 - price/self.avg_entry)
     def _reset_state(self):
-        self.pos_qty = 0.0; self.avg_entry = None; self.used_usdt = 0.0
-        self.leg_usdt = 0.0; self.level = -1; self.last_fill_px = None; self.entry_fees_paid = 0.0; self._cancel_tp()
+        self.pos_qty = 0.0; self.avg_entry = None; self.used_usdt = 0.0; self._cached_tp_price = None
+        self.leg_usdt = 0.0; self.level = -1; self.last_fill_px = None; self.entry_fees_paid = 0.0; self._next_adverse_px = None; self._dca_ladder = (); self._cancel_tp()
 
+    def _fetch_closed_1h(self, limit, start=None, call=None):
+        kw = {} if start is None else {"start": start}
+        r = (call or self._reads.call)(self.http.get_kline, category=self.category, symbol=self.symbol, interval="60", limit=limit, **kw)
+        # v5 kline list is newest-first; drop the still-forming bar
+        a = np.asarray(r["result"]["list"], dtype=np.float64).reshape(-1, 7)[::-1, :5]
+        return a[a[:, 0] + 3600000 <= time.time() * 1000]
+    def _load_klines(self, call=None):
+        buf = self._fetch_closed_1h(200, call=call)
+        if np.any(np.diff(buf[:, 0]) <= 0):
+            log.warning("get_kline not newest-first; sorting by start time"); buf = buf[np.argsort(buf[:, 0])]
+        self._klines_np = buf
+        self._last_bulls = bulls_signal_from_klines(self._klines_np)
+        self._next_hour_ts = (int(time.time()) // 3600 + 1) * 3600
+    def _push_bar(self, row):
+        buf = self._klines_np
+        if len(buf) and row[0] < buf[-1, 0]: return
+        if len(buf) and row[0] == buf[-1, 0]: buf[-1] = row
+        elif len(buf) >= 200: buf[:-1] = buf[1:]; buf[-1] = row
+        else: self._klines_np = np.vstack((buf, row))
+    def _refresh_and_recompute(self):
+        if not len(self._klines_np): self._load_klines(); return
+        nxt = int(self._klines_np[-1, 0]) + 3600000
+        rows = self._fetch_closed_1h(200, start=nxt)
+        if not len(rows): self._next_hour_ts = time.time() + 30; return
+        if rows[0, 0] > nxt: self._load_klines(); return
+        for x in rows: self._push_bar(x)
+        self._last_bulls = bulls_signal_from_klines(self._klines_np)
+        self._next_hour_ts = (int(time.time()) // 3600 + 1) * 3600
     def _pull_bulls_1h(self):
-        r = with_retry(self.http.get_kline, category=self.category, symbol=self.symbol, interval="60", limit=200)
-        lst = sorted(r["result"]["list"], key=lambda x: int(x[0]))
-        sigL, sigS, freshL, freshS, lelex = bulls_signal_from_klines(lst)
-        recent_dir = 0
-        for v in reversed(lelex):
-            if v != 0: recent_dir = v; break
-        return sigL, sigS, freshL, freshS, recent_dir
-
-    def _seed_if_flat(self, price, sigL, sigS, freshL, freshS):
-        if self.pos_qty != 0.0: return
-        seedL = freshL if SEED_FRESH_ONLY else sigL
-        seedS = freshS if SEED_FRESH_ONLY else sigS
+        if time.time() >= self._next_hour_ts:
+            with self._kl_lock: self._refresh_and_recompute()
+        return self._last_bulls
+
+    def _start_ws(self):
+        self._aloop = asyncio.get_running_loop(); self._wake = asyncio.Event()
+        try:
+            self.ws = WebSocket(testnet=False, channel_type=self.category)
+            self.ws.ticker_stream(symbol=self.symbol, callback=self._on_tick)
+            self.ws.kline_stream(interval=60, symbol=self.symbol, callback=self._on_kline)
+            log.info("WebSocket streams up: tickers.%s kline.60.%s", self.symbol, self.symbol)
+        except Exception as e:
+            log.warning("WebSocket start failed, falling back to REST polling: %s", e); self.ws = None
+        try:
+            self.pws = WebSocket(testnet=False, channel_type="private",
+                                 api_key=self.http.api_key, api_secret=self.http.api_secret)
+            self.pws.order_stream(callback=self._on_order)
+            self.pws.execution_stream(callback=self._on_execution)
+            log.info("Private WebSocket streams up: order execution")
+        except Exception as e:
+            log.warning("Private WebSocket start failed, syncing position over REST: %s", e); self.pws = None
+    def _notify(self):
+        self._aloop.call_soon_threadsafe(self._wake.set)
+    def _on_tick(self, msg):
+        # delta pushes omit unchanged fields
+        d = msg.get("data", {}); prev = self._ws_px or (None, None)
+        last = float(d["lastPrice"]) if d.get("lastPrice") else prev[0]
+        mark = float(d["markPrice"]) if d.get("markPrice") else prev[1]
+        if last is None: return
+        self._ws_px = (last, mark if mark is not None else last); self._ws_px_ts = time.monotonic(); self._notify()
+    def _on_order(self, msg):
+        for o in msg.get("data", []):
+            if o.get("orderStatus") == "Filled" and self.tp_link_id and o.get("orderLinkId") == self.tp_link_id:
+                self._tp_filled_link = self.tp_link_id; self._notify()
+    def _on_execution(self, msg):
+        for x in msg.get("data", []):
+            if (x.get("execType") == "Trade" and self.tp_link_id and x.get("orderLinkId") == self.tp_link_id
+                    and float(x.get("leavesQty") or 0.0) == 0.0):
+                self._tp_filled_link = self.tp_link_id; self._notify()
+    def _on_kline(self, msg):
+        for k in msg.get("data", []):
+            if not k.get("confirm"): continue
+            with self._kl_lock:
+                self._push_bar(np.array([k["start"], k["open"], k["high"], k["low"], k["close"]], dtype=np.float64))
+                self._last_bulls = bulls_signal_from_klines(self._klines_np)
+                self._next_hour_ts = (int(time.time()) // 3600 + 1) * 3600
+            self._notify()
+
+    def _seed_if_flat_fresh(self, price, sigL, sigS, freshL, freshS):
+        if self.pos_qty == 0.0: self._seed(price, freshL, freshS)
+    def _seed_if_flat_any(self, price, sigL, sigS, freshL, freshS):
+        if self.pos_qty == 0.0: self._seed(price, sigL, sigS)
+    _seed_if_flat = _seed_if_flat_fresh if SEED_FRESH_ONLY else _seed_if_flat_any
+
+    def _seed(self, price, seedL, seedS):
         if seedL:
             usdt = self.long_base; qty = self._round_qty(usdt / price)
             self._mkt("long", qty, price, reduce=False)
-            self.pos_qty += qty; self.avg_entry = price
+            self.pos_qty += qty; self.avg_entry = price; self._cached_tp_price = None
             self.used_usdt = usdt; self.leg_usdt = usdt; self.level = 0; self.last_fill_px = price
-            self.last_dir = 1; self._place_tp_limit()
+            self.last_dir = 1; self._arm_dca(); self._place_tp_limit()
         elif seedS:
             usdt = self.short_base; qty = self._round_qty(usdt / price)
             self._mkt("short", qty, price, reduce=False)
-            self.pos_qty -= qty; self.avg_entry = price
+            self.pos_qty -= qty; self.avg_entry = price; self._cached_tp_price = None
             self.used_usdt = usdt; self.leg_usdt = usdt; self.level = 0; self.last_fill_px = price
-            self.last_dir = -1; self._place_tp_limit()
+            self.last_dir = -1; self._arm_dca(); self._place_tp_limit()
 
     def _next_adverse(self, is_long, from_px, level): 
         step = FIT_LONG_STEP if is_long else FIT_SHORT_STEP
         return from_px * (1.0 - step) if is_long else from_px * (1.0 + step)
 
+    def _build_ladder(self, base, scale):
+        legs = []; leg = base; used = base
+        for _ in range(MAX_DCA):
+            leg = leg * scale
+            if used + leg > self.budget + 1e-6: break
+            legs.append(leg); used += leg
+        return tuple(legs)
+
+    def _arm_dca(self):
+        if self.level == 0: self._dca_ladder = self._ladder_long if self.pos_qty > 0 else self._ladder_short
+        self._next_adverse_px = (self._next_adverse(self.pos_qty > 0, self.last_fill_px, self.level)
+                                 if self.pos_qty != 0 and 0 <= self.level < len(self._dca_ladder) else None)
+
     def _maybe_dca(self, price):
-        if self.pos_qty == 0 or self.level < 0 or self.level >= MAX_DCA: return
-        is_long = self.pos_qty > 0; next_px = self._next_adverse(is_long, self.last_fill_px, self.level)
-        if is_long and price <= next_px:
-            next_leg = self.leg_usdt * VOL_SCALE_LONG
-            if self.used_usdt + next_leg <= self.budget + 1e-6:
-                add_qty = self._round_qty(next_leg / price)
-                if add_qty > 0:
-                    prev_qty = self.pos_qty; self._mkt("long", add_qty, price, reduce=False)
-                    new_qty = prev_qty + add_qty
-                    self.avg_entry = ((self.avg_entry*prev_qty) + price*add_qty) / max(new_qty,1e-9)
-                    self.pos_qty = new_qty; self.level += 1; self.leg_usdt = next_leg; self.used_usdt += next_leg
-                    self.last_fill_px = price; self._place_tp_limit()
-        elif (not is_long) and price >= next_px:
-            next_leg = self.leg_usdt * VOL_SCALE_SHORT
-            if self.used_usdt + next_leg <= self.budget + 1e-6:
-                add_qty = self._round_qty(next_leg / price)
-                if add_qty > 0:
-                    prev_qty = abs(self.pos_qty); self._mkt("short", add_qty, price, reduce=False)
-                    new_qty = prev_qty + add_qty
-                    self.avg_entry = ((self.avg_entry*prev_qty) + price*add_qty) / max(new_qty,1e-9)
-                    self.pos_qty = -new_qty; self.level += 1; self.leg_usdt = next_leg; self.used_usdt += next_leg
-                    self.last_fill_px = price; self._place_tp_limit()
-
-    def _check_tp_filled_by_sync(self):
+        nap = self._next_adverse_px
+        if nap is None: return
+        if (self.pos_qty > 0 and price <= nap) or (self.pos_qty < 0 and price >= nap): self._execute_dca(price)
+
+    def _execute_dca(self, price):
+        next_leg = self._dca_ladder[self.level]; add_qty = self._round_qty(next_leg / price)
+        if add_qty <= 0: return
+        if self.pos_qty > 0:
+            prev_qty = self.pos_qty; self._mkt("long", add_qty, price, reduce=False)
+        else:
+            prev_qty = abs(self.pos_qty); self._mkt("short", add_qty, price, reduce=False)
+        new_qty = prev_qty + add_qty
+        self.avg_entry = ((self.avg_entry*prev_qty) + price*add_qty) / max(new_qty,1e-9); self._cached_tp_price = None
+        self.pos_qty = new_qty if self.pos_qty > 0 else -new_qty
+        self.level += 1; self.leg_usdt = next_leg; self.used_usdt += next_leg
+        self.last_fill_px = price; self._arm_dca(); self._place_tp_limit()
+
+    def _position_size(self):
+        r = self._reads.call(self.http.get_positions, category=self.category, symbol=self.symbol)
+        for p in r.get("result", {}).get("list", []):
+            sz = float(p.get("size") or 0.0)
+            if sz > 0: return sz
+        return 0.0
+
+    def _check_tp_filled_by_sync(self, size, price):
         try:
-            r = with_retry(self.http.get_positions, category=self.category, symbol=self.symbol)
-            lst = r.get("result", {}).get("list", [])
-            size = 0.0
-            for p in lst:
-                sz = float(p.get("size") or 0.0)
-                if sz > 0: size = sz; break
             if size == 0.0 and self.pos_qty != 0.0:
-                logging.info("Detected position closed on exchange (likely TP filled).")
-                price, _ = self._last_and_mark()
-                self._reset_state()
-                if RESEED_IMMEDIATELY and self.last_dir != 0:
-                    usdt = self.long_base if self.last_dir==1 else self.short_base
-                    qty = self._round_qty(usdt / price); side = "long" if self.last_dir==1 else "short"
-                    self._mkt(side, qty, price, reduce=False)
-                    self.pos_qty = qty if side=="long" else -qty
-                    self.avg_entry = price; self.used_usdt = usdt; self.leg_usdt = usdt
-                    self.level = 0; self.last_fill_px = price; self._place_tp_limit()
-        except Exception as e: logging.warning("sync pos failed: %s", e)
+                log.info("Detected position closed on exchange (likely TP filled).")
+                self._reset_state(); self._after_close(price)
+        except Exception as e: log.warning("sync pos failed: %s", e)
+
+    def _reseed_last_dir(self, price):
+        if self.last_dir == 0: return
+        usdt = self.long_base if self.last_dir==1 else self.short_base
+        qty = self._round_qty(usdt / price); side = "long" if self.last_dir==1 else "short"
+        self._mkt(side, qty, price, reduce=False)
+        self.pos_qty = qty if side=="long" else -qty
+        self.avg_entry = price; self.used_usdt = usdt; self.leg_usdt = usdt; self._cached_tp_price = None
+        self.level = 0; self.last_fill_px = price; self._arm_dca(); self._place_tp_limit()
+    def _stay_flat(self, price): pass
+    _after_close = _reseed_last_dir if RESEED_IMMEDIATELY else _stay_flat
 
     def _maybe_emergency_sl(self, price):
         if not USE_EMERGENCY_SL or self.pos_qty == 0 or self.avg_entry is None: return
@@ -256,12 +429,12 @@ class ADADcaBullsBot:
             sl = self.avg_entry * (1.0 - EMERGENCY_SL_PCT/100.0)
             if price <= sl:
                 qty = self._round_qty(self.pos_qty); self._mkt("long", qty, price, reduce=True)
-                logging.info("Emergency SL LONG at %.6f", price); self._reset_state()
+                log.info("Emergency SL LONG at %.6f", price); self._reset_state()
         else:
             sl = self.avg_entry * (1.0 + EMERGENCY_SL_PCT/100.0)
             if price >= sl:
                 qty = self._round_qty(abs(self.pos_qty)); self._mkt("short", qty, price, reduce=True)
-                logging.info("Emergency SL SHORT at %.6f", price); self._reset_state()
+                log.info("Emergency SL SHORT at %.6f", price); self._reset_state()
 
     def _maybe_flip_on_signal_profit(self, freshL, freshS, price):
         if self.pos_qty == 0 or self.avg_entry is None: return
@@ -269,50 +442,103 @@ class ADADcaBullsBot:
         if self.pos_qty > 0 and freshS and pnl_pct > FLIP_BUFFER_PCT:
             qty = self._round_qty(self.pos_qty); self._mkt("long", qty, price, reduce=True); self._reset_state()
             usdt = self.short_base; q = self._round_qty(usdt/price); self._mkt("short", q, price, reduce=False)
-            self.pos_qty = -q; self.avg_entry = price; self.used_usdt = usdt; self.leg_usdt = usdt
-            self.level = 0; self.last_fill_px = price; self.last_dir = -1; self._place_tp_limit()
+            self.pos_qty = -q; self.avg_entry = price; self.used_usdt = usdt; self.leg_usdt = usdt; self._cached_tp_price = None
+            self.level = 0; self.last_fill_px = price; self.last_dir = -1; self._arm_dca(); self._place_tp_limit()
         elif self.pos_qty < 0 and freshL and pnl_pct > FLIP_BUFFER_PCT:
             qty = self._round_qty(abs(self.pos_qty)); self._mkt("short", qty, price, reduce=True); self._reset_state()
             usdt = self.long_base; q = self._round_qty(usdt/price); self._mkt("long", q, price, reduce=False)
-            self.pos_qty = q; self.avg_entry = price; self.used_usdt = usdt; self.leg_usdt = usdt
-            self.level = 0; self.last_fill_px = price; self.last_dir = 1; self._place_tp_limit()
+            self.pos_qty = q; self.avg_entry = price; self.used_usdt = usdt; self.leg_usdt = usdt; self._cached_tp_price = None
+            self.level = 0; self.last_fill_px = price; self.last_dir = 1; self._arm_dca(); self._place_tp_limit()
+
+    def _io(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+    def _read(self, fn):
+        return asyncio.wait_for(self._io(fn), 10.0)
+    async def _poll(self):
+        # WS caches when fresh; REST positions every 60s with the private stream up, else every POLL_SEC
+        now = time.monotonic()
+        px = self._ws_px if self.ws is not None and now - self._ws_px_ts < 5*POLL_SEC else None
+        sig = self._last_bulls if time.time() < self._next_hour_ts + (30 if self.ws is not None else 0) else None
+        if self.pws is not None:
+            size = None
+            # both private streams report a fill: only act while it is still the live TP
+            filled = self._tp_filled_link is not None and self._tp_filled_link == self.tp_link_id
+            self._tp_filled_link = None
+            if filled: size = 0.0; sync = False
+            else:
+                sync = now >= self._next_sync
+                if sync: self._next_sync = now + 60.0
+        else:
+            size = None; sync = now >= self._next_sync
+            if sync: self._next_sync = now + POLL_SEC
+        return await asyncio.gather(_ready(px) if px is not None else self._read(self._last_and_mark),
+                                    self._read(self._position_size) if sync else _ready(size),
+                                    _ready(sig) if sig is not None else self._read(self._pull_bulls_1h),
+                                    return_exceptions=True)
+
+    def _poll_delay(self, price):
+        if not ADAPTIVE_POLL: return POLL_SEC
+        d = min((abs(price - t) for t in (self._next_adverse_px, self._tp_target()) if t), default=None)
+        return POLL_SEC if d is None else min(POLL_SEC, max(0.5, d / price / 0.001 * 0.5))
+    async def _idle(self, delay):
+        if self.ws is None: await asyncio.sleep(delay); return
+        try:
+            async with asyncio.timeout(delay): await self._wake.wait()
+        except TimeoutError: pass
+        self._wake.clear()
+
+    def _step(self, px, size, sig):
+        last, mark = px; price = (last + mark)/2.0
+        if isinstance(size, Exception):
+            if not isinstance(size, CoolDown): log.warning("sync pos failed: %s", size)
+        elif size is not None: self._check_tp_filled_by_sync(size, price)
+        if isinstance(sig, Exception):
+            if not isinstance(sig, CoolDown): log.warning("Signal fetch failed: %s", sig)
+            sigL=sigS=freshL=freshS=False; recent_dir=0
+        else:
+            sigL, sigS, freshL, freshS, recent_dir = sig
+            if   sigL: self.last_dir = 1
+            elif sigS: self.last_dir = -1
+            elif recent_dir != 0: self.last_dir = recent_dir
+        self._seed_if_flat(price, sigL, sigS, freshL, freshS)
+        if (self.pos_qty == 0 and SEED_ON_LAST_DIR_AT_START and not self.did_start_seed and self.last_dir != 0):
+            usdt = self.long_base if self.last_dir == 1 else self.short_base
+            q = self._round_qty(usdt / price); side = "long" if self.last_dir == 1 else "short"
+            self._mkt(side, q, price, reduce=False)
+            self.pos_qty = q if side == "long" else -q; self.avg_entry = price; self._cached_tp_price = None
+            self.used_usdt = usdt; self.leg_usdt = usdt; self.level = 0; self.last_fill_px = price
+            self._arm_dca(); self._place_tp_limit(); self.did_start_seed = True
+            log.info("Seed-on-start by last 1H direction: %s qty=%s @ %.6f", side.upper(), q, price)
+        self._maybe_dca(price)
+        self._maybe_flip_on_signal_profit(freshL, freshS, price)
+        self._maybe_emergency_sl(price)
 
-    def loop(self):
-        logging.info("Bot started: %s %s | Budget=%.2f (Equity=%s, Cross=%s x%s)",
+    async def loop(self):
+        log.info("Bot started: %s %s | Budget=%.2f (Equity=%s, Cross=%s x%s)",
                      self.symbol, self.category, self.budget, EQUITY_USDT, USE_CROSS, LEVERAGE_X)
-        while True:
-            try:
-                last, mark = self._last_and_mark(); price = (last + mark)/2.0
-            except Exception as e:
-                logging.warning("Price fetch failed: %s", e); import time; time.sleep(POLL_SEC); continue
-            self._check_tp_filled_by_sync()
-            try:
-                sigL, sigS, freshL, freshS, recent_dir = self._pull_bulls_1h()
-                if   sigL: self.last_dir = 1
-                elif sigS: self.last_dir = -1
-                elif recent_dir != 0: self.last_dir = recent_dir
-            except Exception as e:
-                logging.warning("Signal fetch failed: %s", e); sigL=sigS=freshL=freshS=False; recent_dir=0
-            self._seed_if_flat(price, sigL, sigS, freshL, freshS)
-            if (self.pos_qty == 0 and SEED_ON_LAST_DIR_AT_START and not self.did_start_seed and self.last_dir != 0):
-                usdt = self.long_base if self.last_dir == 1 else self.short_base
-                q = self._round_qty(usdt / price); side = "long" if self.last_dir == 1 else "short"
-                self._mkt(side, q, price, reduce=False)
-                self.pos_qty = q if side == "long" else -q; self.avg_entry = price
-                self.used_usdt = usdt; self.leg_usdt = usdt; self.level = 0; self.last_fill_px = price
-                self._place_tp_limit(); self.did_start_seed = True
-                logging.info("Seed-on-start by last 1H direction: %s qty=%s @ %.6f", side.upper(), q, price)
-            self._maybe_dca(price)
-            self._maybe_flip_on_signal_profit(freshL, freshS, price)
-            self._maybe_emergency_sl(price)
-            import time; time.sleep(POLL_SEC)
+        if USE_WS: self._start_ws()
+        try:
+            while True:
+                px, size, sig = await self._poll()
+                if isinstance(px, Exception):
+                    if not isinstance(px, CoolDown): log.warning("Price fetch failed: %s", px)
+                    await asyncio.sleep(POLL_SEC); continue
+                await self._io(self._step, px, size, sig)
+                await self._idle(self._poll_delay(px[0]))
+        finally:
+            if self.ws is not None: self.ws.exit()
+            if self.pws is not None: self.pws.exit()
+            self._pool.shutdown(wait=False, cancel_futures=True)
 
 def main():
     key = os.environ.get("BYBIT_API_KEY") or os.environ.get("API_KEY")
     sec = os.environ.get("BYBIT_API_SECRET") or os.environ.get("API_SECRET")
     if not key or not sec: raise SystemExit("Set BYBIT_API_KEY/BYBIT_API_SECRET")
     http = HTTP(api_key=key, api_secret=sec, recv_window=60000)
-    ADADcaBullsBot(http).loop()
+    http.client.hooks["response"].append(_orjson_response)
+    http.client.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=REST_WORKERS + 1, pool_block=False))
+    _keep_warm(http)
+    asyncio.run(ADADcaBullsBot(http).loop())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# Build-time AOT compile of the BULLS kernel into bulls_aot.<ext> next to the bot,
+# so the live process imports native code instead of JIT-compiling on start.
+# Render runs this after pip install; if it is skipped the bot falls back to @njit.
+import os
+from numba.pycc import CC
+from bulls_kernel import bulls_kernel, SIGNATURE
+
+cc = CC("bulls_aot")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+cc.verbose = True
+cc.export("bulls_kernel", SIGNATURE)(bulls_kernel)
+
+if __name__ == "__main__":
+    cc.compile()
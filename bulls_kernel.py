@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# BULLS per-bar state machine, kept free of numba decorators so the same source
+# is JIT-compiled by ada_dca_bulls_bot.py and AOT-compiled by build_aot.py.
+import numpy as np
+
+# float64[::1] x4, length, bars -> (lelex[-1], lelex[-2], last non-zero lelex)
+SIGNATURE = "UniTuple(i8, 3)(f8[::1], f8[::1], f8[::1], f8[::1], i8, i8)"
+
+def bulls_kernel(o, h, l, c, length, bars):
+    # returns (lelex[-1], lelex[-2], last non-zero lelex) without materialising lelex
+    n = c.shape[0]
+    # monotonic deques of bar indices for the rolling high/low over `length` bars (expanding at the start);
+    # never more than `length` live entries, so each is a fixed int32 ring indexed by ever-growing head/tail
+    qh = np.empty(length, np.int32); qh_head = 0; qh_tail = 0
+    ql = np.empty(length, np.int32); ql_head = 0; ql_tail = 0
+    # c[i] vs c[i-4] in one vectorised compare up front; the loop just accumulates the masks
+    up = np.zeros(n, np.int8); dn = np.zeros(n, np.int8)   # 0/1 per bar: int8 keeps the masks to one byte a lane
+    if n > 4: up[4:] = c[4:] > c[:-4]; dn[4:] = c[4:] < c[:-4]
+    bear = c < o; bull = c > o   # candle-direction half of condShort/condLong, also one pass
+    bindex = 0; sindex = 0; last = 0; prev = 0; recent = 0
+    for i in range(n):
+        hi = h[i]; li = l[i]
+        while qh_tail > qh_head and h[qh[(qh_tail-1) % length]] <= hi: qh_tail -= 1
+        if qh_tail > qh_head and qh[qh_head % length] <= i - length: qh_head += 1
+        qh[qh_tail % length] = i; qh_tail += 1
+        while ql_tail > ql_head and l[ql[(ql_tail-1) % length]] >= li: ql_tail -= 1
+        if ql_tail > ql_head and ql[ql_head % length] <= i - length: ql_head += 1
+        ql[ql_tail % length] = i; ql_tail += 1
+        bindex += up[i]; sindex += dn[i]
+        # non-short-circuit & so each condition is a flat compare chain rather than nested branches
+        v = 0
+        if (bindex > bars) & bear[i] & (hi >= h[qh[qh_head % length]]): bindex = 0; v = -1
+        elif (sindex > bars) & bull[i] & (li <= l[ql[ql_head % length]]): sindex = 0; v = 1
+        prev = last; last = v
+        if v != 0: recent = v
+    return last, prev, recent